@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
 from app.models.chat import ChatRequest, ChatResponse, HealthResponse
 from app.models.quiz import QuizRequest, QuizResponse, QuizSubmission, QuizResult
-from app.services.rag_service import get_rag_service
+from app.services.rag_service import get_rag_service, build_metadata_filter
 from app.services.mcp_service import get_mcp_service
 from app.services.llm_service import get_llm_service
 import uuid
@@ -82,17 +83,27 @@ async def chat(request: ChatRequest):
     try:
         print(f"Processing chat request: {request.message[:50]}...")
         
-        rag_service = get_rag_service()
+        rag_service = await run_in_threadpool(get_rag_service)
         print("RAG service initialized")
         
         mcp_service = get_mcp_service()
         print("MCP service initialized")
         
-        llm_service = get_llm_service()
+        llm_service = await run_in_threadpool(get_llm_service)
         print("LLM service initialized")
 
-        retrieved_docs = rag_service.retrieve_context(request.message)
-        context_text = rag_service.get_context_text(request.message)
+        filters = build_metadata_filter(
+            subject=request.subject,
+            class_level=request.class_level,
+            curriculum=request.curriculum,
+        )
+
+        # Retrieval and LLM calls block, so run them in the threadpool to keep
+        # the event loop free for cheap endpoints
+        retrieved_docs = await run_in_threadpool(
+            rag_service.retrieve_context, request.message, filters=filters
+        )
+        context_text = rag_service.format_context_text(retrieved_docs)
         print(f"Retrieved {len(retrieved_docs)} context documents")
 
         history = None
@@ -103,14 +114,15 @@ async def chat(request: ChatRequest):
             ]
 
         print("Generating LLM response...")
-        response_text = llm_service.generate_response(
+        response_text = await run_in_threadpool(
+            llm_service.generate_response,
             query=request.message,
             context=context_text,
             conversation_history=history,
         )
         print(f"LLM response generated: {len(response_text)} characters")
 
-        sources = rag_service.get_sources(request.message)
+        sources = rag_service.format_sources(retrieved_docs)
         conversation_id = request.conversation_id or str(uuid.uuid4())
 
         return ChatResponse(
@@ -135,8 +147,27 @@ async def generate_quiz(request: QuizRequest):
     try:
         print(f"Generating quiz for subject: {request.subject}, class: {request.class_level}, curriculum: {request.curriculum}")
         
-        llm_service = get_llm_service()
-        
+        llm_service = await run_in_threadpool(get_llm_service)
+
+        # Ground the quiz in knowledge base chunks from the requested partition.
+        # Retrieval is best effort: without it the quiz is generated ungrounded.
+        filters = build_metadata_filter(
+            subject=request.subject,
+            class_level=request.class_level,
+            curriculum=request.curriculum,
+        )
+        try:
+            rag_service = await run_in_threadpool(get_rag_service)
+            context_text = await run_in_threadpool(
+                rag_service.get_context_text,
+                f"Key concepts in {request.subject} for {request.class_level}",
+                filters=filters,
+            )
+            print(f"Retrieved {len(context_text)} characters of quiz context")
+        except Exception as e:
+            print(f"Quiz context retrieval failed, generating without context: {e}")
+            context_text = ""
+
         # Create prompt for quiz generation
         prompt = f"""
         Generate a quiz with 5-10 multiple choice questions for {request.subject} at {request.class_level} level following {request.curriculum} curriculum.
@@ -146,6 +177,7 @@ async def generate_quiz(request: QuizRequest):
         - Only one correct answer per question
         - Questions should be appropriate for the class level
         - Cover key concepts in the subject
+        - Base the questions on the provided context where it is relevant
         
         Return ONLY valid JSON with this exact structure, no additional text:
         {{
@@ -164,10 +196,12 @@ async def generate_quiz(request: QuizRequest):
         }}
         """
         
-        response_text = llm_service.generate_response(
+        response_text = await run_in_threadpool(
+            llm_service.generate_response,
             query=prompt,
-            context="",  # No RAG context for quiz generation
+            context=context_text,
             conversation_history=None,
+            task="quiz",
         )
         
         print(f"LLM response: {response_text[:500]}...")
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List, Literal
+from typing import Dict, List, Literal
 
 
 class Settings(BaseSettings):
@@ -11,21 +11,75 @@ class Settings(BaseSettings):
 
     llm_provider: Literal["github"]
     llm_model: str
+    # Comma-separated model tiers, cheapest/fastest first (defaults to llm_model)
+    llm_tiers: str = ""
+    # Any OpenAI-compatible endpoint, e.g. a local stub for testing
+    llm_base_url: str = "https://models.inference.ai.azure.com"
+    # Default per-call timeout in seconds; task profiles may override it
+    llm_timeout: float = 30.0
+    # Client retries on the last tier a call can use, when no fallback is left
+    llm_max_retries: int = 2
+    # Prompts longer than this many characters are routed one tier up (0 disables)
+    llm_long_prompt_chars: int = 6000
+    # Per-task overrides of tier/max_tokens/temperature/timeout, e.g. {"quiz": {"tier": 1}}
+    llm_task_profiles: Dict[str, Dict[str, float]] = {}
 
     embedding_provider: Literal["local"]
     embedding_model: str
 
     vector_store_type: str
     vectorstore_path: str
+    # Seconds between checks for a newly published index snapshot (0 disables)
+    index_reload_interval: float = 30.0
+    index_snapshots_keep: int = 3
 
     data_path: str = "./data"
     chunk_size: int
     chunk_overlap: int
     top_k_retrieval: int
+    # Chunks whose estimated Jaccard similarity to an earlier chunk reaches this
+    # are dropped at ingest (1 disables)
+    dedup_threshold: float = 0.85
+    # Pick top_k from retrieval_fetch_k candidates by maximal marginal relevance;
+    # retrieval_mmr_lambda 1 favours relevance only, 0 diversity only
+    retrieval_mmr: bool = True
+    retrieval_fetch_k: int = 20
+    retrieval_mmr_lambda: float = 0.5
     max_context_length: int
 
+    # Admission control: LLM-bound routes (chat, quiz generation) and cheap
+    # routes (health, quiz submission) get separate concurrency pools, queue
+    # limits and per-client rate limits
+    admission_llm_concurrency: int = 4
+    admission_llm_queue: int = 16
+    admission_llm_queue_timeout: float = 30.0
+    admission_llm_rate_per_minute: float = 30.0
+    admission_llm_burst: int = 10
+    admission_cheap_concurrency: int = 100
+    admission_cheap_queue: int = 200
+    admission_cheap_queue_timeout: float = 1.0
+    admission_cheap_rate_per_minute: float = 600.0
+    admission_cheap_burst: int = 60
+    admission_retry_after: int = 5
+    # How clients are identified for per-client rate limits: "off" (no
+    # per-client limits), "ip" (socket peer), "forwarded_for" (X-Forwarded-For
+    # entry appended by the trusted proxy nearest to us) or "header" (the value
+    # of admission_client_header, e.g. a user or session id)
+    admission_client_key: Literal["off", "ip", "forwarded_for", "header"] = "off"
+    # Number of trusted proxies in front of the app when using forwarded_for
+    admission_trusted_proxy_hops: int = 1
+    admission_client_header: str = "X-Client-Id"
+
     cors_origins: List[str] = ["http://localhost:8080", "http://localhost:3000", "http://127.0.0.1:8080"]
 
+    @field_validator("index_snapshots_keep")
+    @classmethod
+    def check_index_snapshots_keep(cls, v):
+        # Workers that have not yet noticed a switch still serve the previous snapshot
+        if v < 2:
+            raise ValueError("index_snapshots_keep must be at least 2")
+        return v
+
     @field_validator("cors_origins", mode="before")
     @classmethod
     def parse_cors_origins(cls, v):
@@ -1,10 +1,22 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router
 from app.config import settings
+from app.middleware.admission import AdmissionControlMiddleware
+from app.services.rag_service import shutdown_rag_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the snapshot watcher thread and close the served vector store
+    shutdown_rag_service()
 
-app = FastAPI(title="PedaGrowAI API")
+
+app = FastAPI(title="PedaGrowAI API", lifespan=lifespan)
 
 default_origins = [
     "http://localhost:8080",
@@ -17,6 +29,9 @@ cors_origins = settings.cors_origins if (settings.cors_origins and len(settings.
 
 print(f"CORS Origins: {cors_origins}")
 
+# Added before CORS so that CORS wraps it and 429/503 responses carry CORS headers
+app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
@@ -0,0 +1,234 @@
+"""
+Admission control and load shedding.
+
+Requests are sorted into route classes with their own concurrency pool, queue
+depth limit and per-client token bucket. Expensive LLM-bound calls therefore
+cannot starve cheap ones, and once a class is saturated new requests are
+rejected immediately with 429 (client over its rate) or 503 (queue full)
+plus a Retry-After header instead of piling up.
+"""
+
+import asyncio
+import math
+import time
+from typing import Dict, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+# (method, path) -> route class. Unlisted routes (docs, CORS preflight) bypass admission.
+ROUTE_CLASSES = {
+    ("POST", "/api/chat"): "llm",
+    ("POST", "/api/quiz/generate"): "llm",
+    ("GET", "/api/health"): "cheap",
+    ("POST", "/api/quiz/submit"): "cheap",
+}
+
+# Idle buckets are dropped once a route class tracks more clients than this
+MAX_TRACKED_CLIENTS = 10000
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Take one token. Returns 0 on success, otherwise seconds until one is available."""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        """Return a token taken for a request that was shed before running."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class ConcurrencyPool:
+    """Bounded concurrency with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self) -> bool:
+        """Acquire a slot. Returns False if the queue is full or the wait timed out."""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return True
+
+        if self.waiting >= self.max_queue:
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self._semaphore.release()
+
+
+class RouteClass:
+    """Limits shared by every route in one class."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        rate_per_minute: float,
+        burst: int,
+    ):
+        self.name = name
+        self.pool = ConcurrencyPool(max_concurrency, max_queue, queue_timeout)
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def check_rate(self, client: str) -> float:
+        """Charge one request to `client`. Returns seconds to wait, 0 if allowed."""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                self._buckets = {
+                    key: b for key, b in self._buckets.items() if not b.is_full()
+                }
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+        return bucket.take()
+
+    def refund(self, client: str):
+        bucket = self._buckets.get(client)
+        if bucket is not None:
+            bucket.refund()
+
+
+def build_route_classes() -> Dict[str, RouteClass]:
+    return {
+        "llm": RouteClass(
+            "llm",
+            max_concurrency=settings.admission_llm_concurrency,
+            max_queue=settings.admission_llm_queue,
+            queue_timeout=settings.admission_llm_queue_timeout,
+            rate_per_minute=settings.admission_llm_rate_per_minute,
+            burst=settings.admission_llm_burst,
+        ),
+        "cheap": RouteClass(
+            "cheap",
+            max_concurrency=settings.admission_cheap_concurrency,
+            max_queue=settings.admission_cheap_queue,
+            queue_timeout=settings.admission_cheap_queue_timeout,
+            rate_per_minute=settings.admission_cheap_rate_per_minute,
+            burst=settings.admission_cheap_burst,
+        ),
+    }
+
+
+def client_key(scope: Scope) -> Optional[str]:
+    """
+    Identify the client for per-client rate limits according to
+    settings.admission_client_key, or None when per-client limits are off.
+    """
+    mode = settings.admission_client_key
+    if mode == "off":
+        return None
+
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if mode == "ip":
+        return peer
+
+    headers = {
+        name.decode("latin-1").lower(): value.decode("latin-1")
+        for name, value in scope.get("headers", [])
+    }
+    if mode == "header":
+        value = headers.get(settings.admission_client_header.lower(), "").strip()
+        return f"header:{value}" if value else peer
+
+    # Each trusted proxy appends the address it received the request from, so
+    # the client is the entry that many hops from the right; anything further
+    # left can be forged by the client
+    forwarded = [a.strip() for a in headers.get("x-forwarded-for", "").split(",") if a.strip()]
+    hops = settings.admission_trusted_proxy_hops
+    if hops > 0 and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return peer
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware applying per-route-class admission control."""
+
+    def __init__(self, app: ASGIApp, route_classes: Optional[Dict[str, RouteClass]] = None):
+        self.app = app
+        self.route_classes = route_classes or build_route_classes()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        class_name = ROUTE_CLASSES.get((scope["method"], scope["path"].rstrip("/")))
+        if class_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.route_classes[class_name]
+        client_id = client_key(scope)
+
+        if client_id is not None:
+            wait = route_class.check_rate(client_id)
+            if wait > 0:
+                retry_after = settings.admission_retry_after if math.isinf(wait) else math.ceil(wait)
+                await self._reject(scope, receive, send, 429, "Rate limit exceeded", retry_after)
+                return
+
+        if not await route_class.pool.acquire():
+            # A shed request never ran, so it does not count against the client
+            if client_id is not None:
+                route_class.refund(client_id)
+            print(f"Shedding {class_name} request to {scope['path']}: queue full")
+            await self._reject(
+                scope, receive, send, 503, "Server is busy, please retry later",
+                settings.admission_retry_after,
+            )
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.pool.release()
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str, retry_after: int):
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(max(int(retry_after), 1))},
+        )
+        await response(scope, receive, send)
@@ -14,6 +14,9 @@ class ChatRequest(BaseModel):
     message: str = Field(..., description="User's message", min_length=1)
     conversation_id: Optional[str] = Field(None, description="Optional conversation ID for context")
     history: Optional[List[ChatMessage]] = Field(None, description="Optional conversation history")
+    subject: Optional[str] = Field(None, description="Optional subject to restrict retrieval to")
+    class_level: Optional[str] = Field(None, description="Optional class/grade level to restrict retrieval to")
+    curriculum: Optional[str] = Field(None, description="Optional curriculum to restrict retrieval to")
 
 
 class ChatResponse(BaseModel):
@@ -0,0 +1,118 @@
+"""
+Near-duplicate chunk detection with MinHash + LSH.
+
+Chunks are reduced to word shingles, summarised by a MinHash signature and
+bucketed with locality-sensitive hashing so only likely duplicates are
+compared. Pairs whose estimated Jaccard similarity reaches the threshold are
+treated as duplicates and only the first occurrence is kept.
+"""
+
+import hashlib
+import random
+import re
+from typing import TYPE_CHECKING, Dict, List, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"\w+")
+
+# Fixed seed so signatures are stable across processes and index builds
+_rng = random.Random(1234)
+_PERMUTATIONS = [
+    (_rng.randint(1, _MERSENNE_PRIME - 1), _rng.randint(0, _MERSENNE_PRIME - 1))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Lower-cased word n-grams of `text`; short texts yield a single shingle."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash_signature(items: Set[str]) -> Tuple[int, ...]:
+    if not items:
+        return tuple([_MAX_HASH] * NUM_PERMUTATIONS)
+
+    hashes = [
+        int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=4).digest(), "little")
+        for item in items
+    ]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def find_near_duplicates(texts: List[str], threshold: float) -> Set[int]:
+    """Return indexes of texts that near-duplicate an earlier text."""
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    signatures = []
+    duplicates = set()
+
+    for index, text in enumerate(texts):
+        signature = minhash_signature(shingles(text))
+        signatures.append(signature)
+
+        band_keys = [
+            (band, signature[band * rows:(band + 1) * rows])
+            for band in range(LSH_BANDS)
+        ]
+        candidates = set()
+        for key in band_keys:
+            candidates.update(buckets.get(key, ()))
+
+        if any(
+            estimate_similarity(signature, signatures[other]) >= threshold
+            for other in candidates
+        ):
+            duplicates.add(index)
+            continue
+
+        # Only kept texts are indexed, so duplicates are matched against originals
+        for key in band_keys:
+            buckets.setdefault(key, []).append(index)
+
+    return duplicates
+
+
+def deduplicate_documents(
+    documents: List["Document"],
+    threshold: float,
+    group_by: Sequence[str] = (),
+) -> List["Document"]:
+    """
+    Drop chunks that near-duplicate an earlier chunk (threshold >= 1 disables).
+    Chunks are only compared with chunks that share the same values for the
+    `group_by` metadata fields, so material repeated across partitions (e.g.
+    the same topic in two class levels) stays retrievable from each of them.
+    """
+    if threshold >= 1 or len(documents) < 2:
+        return documents
+
+    groups: Dict[Tuple, List[int]] = {}
+    for index, doc in enumerate(documents):
+        key = tuple(doc.metadata.get(field) for field in group_by)
+        groups.setdefault(key, []).append(index)
+
+    duplicates = set()
+    for indexes in groups.values():
+        found = find_near_duplicates([documents[i].page_content for i in indexes], threshold)
+        duplicates.update(indexes[i] for i in found)
+
+    return [doc for i, doc in enumerate(documents) if i not in duplicates]
@@ -0,0 +1,271 @@
+"""
+Versioned vector store snapshots.
+
+Each index build is written to its own directory and only becomes live once a
+pointer file is atomically switched to it, so readers never see a half-written
+store. Layout under `settings.vectorstore_path`:
+
+    snapshots/<version>/    Chroma persist directory plus manifest.json
+    CURRENT                 name of the live snapshot version
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MANIFEST_NAME = "manifest.json"
+POINTER_NAME = "CURRENT"
+LOCK_NAME = "BUILD.lock"
+
+
+def _lock_file(f):
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ~10 seconds; keep waiting for the builder
+                continue
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """Manages snapshot directories, their manifests and the live pointer."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.snapshots_dir = os.path.join(self.root, "snapshots")
+        self.pointer_path = os.path.join(self.root, POINTER_NAME)
+        self.lock_path = os.path.join(self.root, LOCK_NAME)
+
+    @contextmanager
+    def build_lock(self):
+        """
+        Hold an exclusive, cross-process lock for building and publishing.
+        The OS releases it if the holder dies, so a crashed build never
+        leaves the store locked. Not re-entrant.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.lock_path, "a+") as f:
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+
+    def snapshot_path(self, version: str) -> str:
+        return os.path.join(self.snapshots_dir, version)
+
+    def current_version(self) -> Optional[str]:
+        """Return the live snapshot version, or None if nothing is published."""
+        try:
+            with open(self.pointer_path, "r", encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def list_versions(self) -> List[str]:
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        # Versions start with a UTC timestamp, so name order is build order
+        return sorted(
+            name for name in os.listdir(self.snapshots_dir)
+            if os.path.isdir(os.path.join(self.snapshots_dir, name))
+        )
+
+    def create_snapshot_dir(self) -> Tuple[str, str]:
+        """Create an empty directory for a new snapshot and return (version, path)."""
+        now = time.time()
+        version = "{}-{:06d}-{}".format(
+            time.strftime("%Y%m%d-%H%M%S", time.gmtime(now)),
+            int(now % 1 * 1_000_000),
+            uuid.uuid4().hex[:6],
+        )
+        path = self.snapshot_path(version)
+        os.makedirs(path)
+        return version, path
+
+    def _checksums(self, path: str) -> Dict[str, str]:
+        checksums = {}
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                relative = os.path.relpath(full_path, path).replace(os.sep, "/")
+                if relative == MANIFEST_NAME:
+                    continue
+                checksums[relative] = _file_checksum(full_path)
+        return checksums
+
+    def write_manifest(self, version: str, **info) -> Dict:
+        """Record checksums of every file in a finished snapshot."""
+        path = self.snapshot_path(version)
+        manifest = {
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "files": self._checksums(path),
+            **info,
+        }
+        with open(os.path.join(path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        return manifest
+
+    def read_manifest(self, version: str) -> Dict:
+        with open(os.path.join(self.snapshot_path(version), MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def verify(self, version: str) -> None:
+        """Raise RuntimeError if a snapshot is missing files or fails its checksums."""
+        try:
+            manifest = self.read_manifest(version)
+        except FileNotFoundError:
+            raise RuntimeError(f"Snapshot {version} has no manifest")
+
+        path = self.snapshot_path(version)
+        for relative, expected in manifest.get("files", {}).items():
+            full_path = os.path.join(path, *relative.split("/"))
+            if not os.path.isfile(full_path):
+                raise RuntimeError(f"Snapshot {version} is missing {relative}")
+            if _file_checksum(full_path) != expected:
+                raise RuntimeError(f"Snapshot {version} checksum mismatch for {relative}")
+
+    def publish(self, version: str) -> None:
+        """Atomically point CURRENT at `version`."""
+        if not os.path.isdir(self.snapshot_path(version)):
+            raise RuntimeError(f"Snapshot {version} does not exist")
+
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=POINTER_NAME + ".", dir=self.root)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(version)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.pointer_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def prune(self, keep: int) -> List[str]:
+        """
+        Delete all but the newest `keep` snapshots. The live snapshot is never
+        removed, and keeping at least two lets workers that have not yet
+        noticed a switch finish serving from the previous one.
+        """
+        if keep < 2:
+            raise ValueError("At least two snapshots must be kept")
+
+        current = self.current_version()
+        old = [v for v in self.list_versions() if v != current]
+        removed = old[:max(len(old) - (keep - 1), 0)]
+        for version in removed:
+            shutil.rmtree(self.snapshot_path(version), ignore_errors=True)
+        return removed
+
+
+class ServedStore:
+    """
+    A loaded snapshot shared by in-flight requests. Once retired by a hot
+    swap it is closed as soon as its last user releases it, so each worker
+    only keeps the snapshots it is actually serving open.
+    """
+
+    def __init__(self, vectorstore: Any, version: str, close: Callable[[Any], None]):
+        self.vectorstore = vectorstore
+        self.version = version
+        self._close = close
+        self._lock = threading.Lock()
+        self._users = 0
+        self._retired = False
+        self._closed = False
+
+    def acquire(self) -> Any:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Snapshot {self.version} is closed")
+            self._users += 1
+        return self.vectorstore
+
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            should_close = self._retired and self._users == 0 and not self._closed
+            if should_close:
+                self._closed = True
+        if should_close:
+            self._close(self.vectorstore)
+
+    def retire(self) -> None:
+        with self._lock:
+            self._retired = True
+            should_close = self._users == 0 and not self._closed
+            if should_close:
+                self._closed = True
+        if should_close:
+            self._close(self.vectorstore)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+def close_chroma_store(vectorstore: Any) -> None:
+    """
+    Stop a langchain Chroma store's client. chromadb caches one system (SQLite
+    connection plus in-memory index) per persist directory, so the system is
+    also dropped from that cache; otherwise every hot reload would keep
+    another full index in memory.
+    """
+    system = getattr(getattr(vectorstore, "_client", None), "_system", None)
+    if system is None:
+        return
+
+    try:
+        from chromadb.api.client import SharedSystemClient
+    except ImportError:
+        SharedSystemClient = None
+
+    if SharedSystemClient is not None:
+        # Attribute name as spelled by chromadb
+        cache = getattr(SharedSystemClient, "_identifer_to_system", {})
+        for identifier, cached in list(cache.items()):
+            if cached is system:
+                del cache[identifier]
+
+    system.stop()
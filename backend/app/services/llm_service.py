@@ -2,17 +2,17 @@
 LLM service for AI response generation using GitHub Models (phi-4).
 """
 
+import threading
 from typing import Optional, List, Dict
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 
 from app.config import settings
+from app.services.model_router import ModelRouter, build_model_router
 
 
 class LLMService:
     def __init__(self):
         print("Initializing LLM service...")
-        self.llm = None
+        self.router: ModelRouter | None = None
         self._initialize_llm()
         print("LLM service initialized successfully")
 
@@ -27,24 +27,20 @@ class LLMService:
             raise ValueError("LLM_MODEL must be set (e.g. phi-4)")
 
         print(f"LLM Provider: github")
-        print(f"LLM Model: {settings.llm_model}")
         print(f"GitHub Token present: {bool(settings.github_token)}")
 
-        
-        self.llm = ChatOpenAI(
-            model=settings.llm_model,  
-            api_key=settings.github_token,
-            base_url="https://models.inference.ai.azure.com",
-            temperature=0.7,
-            max_tokens=settings.max_context_length,
-        )
+        self.router = build_model_router()
+        print(f"LLM Tiers: {', '.join(self.router.tiers)}")
 
     def generate_response(
         self,
         query: str,
         context: Optional[str] = None,
         conversation_history: Optional[List[Dict[str, str]]] = None,
+        task: str = "chat",
     ) -> str:
+        from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+
         messages = []
 
         messages.append(
@@ -72,18 +68,20 @@ Question:
 
         try:
             print("Generating LLM response...")
-            response = self.llm.invoke(messages)
-            return response.content
+            return self.router.invoke(messages, task=task)
         except Exception as e:
             print(f"LLM error: {e}")
             return "Sorry, I encountered an error while generating a response."
 
 
 _llm_service: LLMService | None = None
+_llm_service_lock = threading.Lock()
 
 
 def get_llm_service() -> LLMService:
     global _llm_service
     if _llm_service is None:
-        _llm_service = LLMService()
-    return _llm_service
\ No newline at end of file
+        with _llm_service_lock:
+            if _llm_service is None:
+                _llm_service = LLMService()
+    return _llm_service
@@ -0,0 +1,172 @@
+"""
+Routes LLM calls across a list of model tiers.
+
+Tiers are ordered cheapest/fastest first. Each task type (chat, quiz,
+summarization) has a profile that picks its starting tier and its own
+max_tokens/temperature/timeout; prompts longer than `llm_long_prompt_chars`
+start one tier up. If a model times out or is unavailable the call falls back
+to the remaining tiers in order, and the last tier is retried by the client.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+
+class TaskProfile:
+    """Generation settings for one kind of LLM call."""
+
+    def __init__(self, name: str, tier: int, max_tokens: int, temperature: float, timeout: float):
+        self.name = name
+        self.tier = tier
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout = timeout
+
+
+def default_task_profiles() -> Dict[str, TaskProfile]:
+    return {
+        "chat": TaskProfile(
+            "chat", tier=0, max_tokens=settings.max_context_length, temperature=0.7,
+            timeout=settings.llm_timeout,
+        ),
+        # Five questions of JSON take several times longer to generate than a chat reply
+        "quiz": TaskProfile(
+            "quiz", tier=0, max_tokens=2048, temperature=0.4, timeout=settings.llm_timeout * 3,
+        ),
+        # No endpoint summarizes yet; defined so one can opt in with task="summarization"
+        "summarization": TaskProfile(
+            "summarization", tier=0, max_tokens=512, temperature=0.3, timeout=settings.llm_timeout,
+        ),
+    }
+
+
+def load_task_profiles() -> Dict[str, TaskProfile]:
+    """Default profiles with per-field overrides from settings.llm_task_profiles."""
+    profiles = default_task_profiles()
+    for name, overrides in settings.llm_task_profiles.items():
+        profile = profiles.setdefault(
+            name,
+            TaskProfile(
+                name, tier=0, max_tokens=settings.max_context_length, temperature=0.7,
+                timeout=settings.llm_timeout,
+            ),
+        )
+        if "tier" in overrides:
+            profile.tier = int(overrides["tier"])
+        if "max_tokens" in overrides:
+            profile.max_tokens = int(overrides["max_tokens"])
+        if "temperature" in overrides:
+            profile.temperature = float(overrides["temperature"])
+        if "timeout" in overrides:
+            profile.timeout = float(overrides["timeout"])
+    return profiles
+
+
+def parse_tiers(value: str, default_model: str) -> List[str]:
+    tiers = [m.strip() for m in value.split(",") if m.strip()]
+    return tiers or [default_model]
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        tiers: List[str],
+        profiles: Dict[str, TaskProfile],
+        base_url: str,
+        api_key: str,
+        long_prompt_chars: int,
+        max_retries: int = 2,
+    ):
+        if not tiers:
+            raise ValueError("At least one LLM tier is required")
+
+        self.tiers = tiers
+        self.profiles = profiles
+        self.base_url = base_url
+        self.api_key = api_key
+        self.long_prompt_chars = long_prompt_chars
+        self.max_retries = max_retries
+        self._clients = {}
+
+    def get_profile(self, task: str) -> TaskProfile:
+        if task not in self.profiles:
+            raise ValueError(f"Unknown LLM task: {task}")
+        return self.profiles[task]
+
+    def route(self, task: str, prompt_chars: int) -> List[str]:
+        """Return the models to try for a call, in order."""
+        profile = self.get_profile(task)
+        tier = profile.tier
+        if self.long_prompt_chars and prompt_chars > self.long_prompt_chars:
+            tier += 1
+        tier = max(0, min(tier, len(self.tiers) - 1))
+
+        return [self.tiers[tier]] + [m for i, m in enumerate(self.tiers) if i != tier]
+
+    def _get_client(self, model: str, profile: TaskProfile, max_retries: int):
+        key = (model, profile.max_tokens, profile.temperature, profile.timeout, max_retries)
+        if key not in self._clients:
+            from langchain_openai import ChatOpenAI
+
+            self._clients[key] = ChatOpenAI(
+                model=model,
+                api_key=self.api_key,
+                base_url=self.base_url,
+                temperature=profile.temperature,
+                max_tokens=profile.max_tokens,
+                timeout=profile.timeout,
+                max_retries=max_retries,
+            )
+        return self._clients[key]
+
+    def invoke(self, messages, task: str = "chat") -> str:
+        """Send `messages` to the routed model, falling back across tiers."""
+        import openai
+
+        fallback_errors = (
+            openai.APITimeoutError,
+            openai.APIConnectionError,
+            openai.RateLimitError,
+            openai.InternalServerError,
+        )
+
+        profile = self.get_profile(task)
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        last_error: Optional[Exception] = None
+
+        models = self.route(task, prompt_chars)
+        for index, model in enumerate(models):
+            is_last = index == len(models) - 1
+            # Falling back to the next tier replaces client-side retries, but
+            # the last tier (the only one without LLM_TIERS) keeps them
+            max_retries = self.max_retries if is_last else 0
+
+            started = time.perf_counter()
+            try:
+                response = self._get_client(model, profile, max_retries).invoke(messages)
+            except fallback_errors as e:
+                if is_last:
+                    print(f"LLM {model} failed for {task} ({type(e).__name__}), no tiers left")
+                else:
+                    print(f"LLM {model} failed for {task} ({type(e).__name__}), trying next tier")
+                last_error = e
+                continue
+
+            elapsed = time.perf_counter() - started
+            print(f"LLM {model} answered {task} in {elapsed:.2f}s")
+            return response.content
+
+        raise last_error
+
+
+def build_model_router() -> ModelRouter:
+    return ModelRouter(
+        tiers=parse_tiers(settings.llm_tiers, settings.llm_model),
+        profiles=load_task_profiles(),
+        base_url=settings.llm_base_url,
+        api_key=settings.github_token,
+        long_prompt_chars=settings.llm_long_prompt_chars,
+        max_retries=settings.llm_max_retries,
+    )
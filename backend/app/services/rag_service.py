@@ -1,27 +1,135 @@
 
 import os
-from typing import List, Optional
-
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import TextLoader, DirectoryLoader
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_core.documents import Document
+import re
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from app.config import settings
+from app.services.dedup import deduplicate_documents
+from app.services.index_snapshots import ServedStore, SnapshotStore, close_chroma_store
+
+# langchain_community, chromadb and sentence-transformers (torch) are imported
+# inside the methods that need them so that importing this module - and
+# therefore app.main - stays cheap for processes that never touch retrieval.
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+
+# Metadata fields used to partition the knowledge base. Chunks that do not
+# declare a value for a field are tagged with ANY_VALUE and match every filter
+# on that field, so general material (study tips etc.) stays retrievable.
+PARTITION_FIELDS = ("curriculum", "class_level", "subject")
+ANY_VALUE = "any"
+
+# Subjects related to a requested subject. A broad subject matches its
+# branches ("science" -> physics material) and a branch matches material
+# tagged with the broad subject ("physics" -> general science material).
+SUBJECT_ALIASES = {
+    "math": ("mathematics",),
+    "maths": ("mathematics",),
+    "science": ("physics", "chemistry", "biology"),
+    "physics": ("science",),
+    "chemistry": ("science",),
+    "biology": ("science",),
+}
+
+_FRONT_MATTER_RE = re.compile(r"\A---\s*\n(.*?)\n---\s*(?:\n|\Z)", re.DOTALL)
+
+
+def normalize_partition_value(value: Optional[str]) -> Optional[str]:
+    """Normalize a subject/class/curriculum label, e.g. 'Class 10' -> 'class_10'."""
+    if value is None:
+        return None
+    value = re.sub(r"[\s_\-]+", "_", value.strip().lower()).strip("_")
+    return value or None
+
+
+def parse_front_matter(text: str) -> Tuple[Dict[str, str], str]:
+    """Split an optional '---' delimited 'key: value' header from a document."""
+    match = _FRONT_MATTER_RE.match(text)
+    if not match:
+        return {}, text
+
+    fields = {}
+    for line in match.group(1).splitlines():
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        fields[key.strip().lower()] = value.strip()
+    return fields, text[match.end():]
+
+
+def derive_partition_metadata(
+    source: str, data_path: str, front_matter: Dict[str, str]
+) -> Dict[str, str]:
+    """
+    Derive partition metadata for a document.
+
+    Directory layout is read from the innermost directory outwards, so
+    data/<curriculum>/<class_level>/<subject>/notes.txt tags all three fields
+    and data/<subject>/notes.txt tags only the subject. Front-matter values
+    take precedence over the layout.
+    """
+    relative_dir = os.path.dirname(os.path.relpath(source, data_path))
+    parts = [p for p in relative_dir.split(os.sep) if p and p != "."]
+
+    metadata = {}
+    for field, part in zip(reversed(PARTITION_FIELDS), reversed(parts)):
+        metadata[field] = part
+
+    for field in PARTITION_FIELDS:
+        if front_matter.get(field):
+            metadata[field] = front_matter[field]
+
+    return {
+        field: normalize_partition_value(metadata.get(field)) or ANY_VALUE
+        for field in PARTITION_FIELDS
+    }
+
+
+def build_metadata_filter(
+    subject: Optional[str] = None,
+    class_level: Optional[str] = None,
+    curriculum: Optional[str] = None,
+) -> Optional[Dict]:
+    """Build a Chroma `where` clause restricting retrieval to a partition."""
+    requested = {
+        "subject": normalize_partition_value(subject),
+        "class_level": normalize_partition_value(class_level),
+        "curriculum": normalize_partition_value(curriculum),
+    }
+    clauses = []
+    for field, value in requested.items():
+        if not value:
+            continue
+        accepted = [value]
+        if field == "subject":
+            accepted += [a for a in SUBJECT_ALIASES.get(value, ()) if a not in accepted]
+        clauses.append({field: {"$in": accepted + [ANY_VALUE]}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
 
 
 class RAGService:
     """Service for retrieving relevant context from knowledge base."""
 
-    def __init__(self):
+    def __init__(self, load_vectorstore: bool = True):
         self.embeddings = None
-        self.vectorstore = None
+        self._served: Optional[ServedStore] = None
+        self.snapshots = SnapshotStore(settings.vectorstore_path)
+        self._swap_lock = threading.Lock()
+        self._stop_watcher = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
 
         try:
             print("Initializing RAG service...")
 
-            
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+
             self.text_splitter = RecursiveCharacterTextSplitter(
                 chunk_size=settings.chunk_size,
                 chunk_overlap=settings.chunk_overlap,
@@ -33,7 +141,9 @@ class RAGService:
             self._initialize_embeddings()
             print("Embedding model loaded successfully")
 
-            
+            if not load_vectorstore:
+                return
+
             print("Initializing vector store...")
             self._initialize_vectorstore()
             print(f"Vector store initialized: {self.vectorstore is not None}")
@@ -41,6 +151,9 @@ class RAGService:
             if self.vectorstore is None:
                 raise RuntimeError("Vector store failed to initialize")
 
+            if settings.index_reload_interval > 0:
+                self._start_watcher()
+
         except Exception as e:
             import traceback
             print(f"❌ Error initializing RAG service: {e}")
@@ -53,6 +166,8 @@ class RAGService:
                 "Only local embeddings are supported with GitHub Models"
             )
 
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
         self.embeddings = HuggingFaceEmbeddings(
             model_name=settings.embedding_model
         )
@@ -63,37 +178,78 @@ class RAGService:
                 f"Unsupported vector store type: {settings.vector_store_type}"
             )
 
-        persist_directory = os.path.abspath(settings.vectorstore_path)
-        os.makedirs(persist_directory, exist_ok=True)
-
+        version = self.snapshots.current_version()
         try:
-            print("Attempting to load existing vector store...")
-            self.vectorstore = Chroma(
-                persist_directory=persist_directory,
-                embedding_function=self.embeddings,
-            )
-
-            if self.vectorstore._collection.count() == 0:
-                raise RuntimeError("Vector store exists but is empty")
+            if version is None:
+                raise RuntimeError("No index snapshot has been published")
 
+            print(f"Attempting to load index snapshot {version}...")
+            self._serve(self._open_snapshot(version), version)
             print("Existing vector store loaded successfully")
 
         except Exception as e:
             print(f"Creating new vector store because: {e}")
-            self._load_and_index_documents()
+            failed_version = version
+
+            # Only one worker builds; the others wait here and then load
+            # whatever it published instead of embedding the corpus again
+            with self.snapshots.build_lock():
+                version = self.snapshots.current_version()
+                if version is not None and version != failed_version:
+                    try:
+                        self._serve(self._open_snapshot(version), version)
+                        print(f"Loaded index snapshot {version} published by another worker")
+                    except Exception as e:
+                        print(f"Creating new vector store because: {e}")
+
+                if self.vectorstore is None:
+                    version = self.build_snapshot()
+                    self._serve(self._open_snapshot(version), version)
 
         if self.vectorstore is None:
             raise RuntimeError("Vector store failed to initialize")
 
-    def _load_and_index_documents(self):
+    def _open_snapshot(self, version: str):
+        """Verify a snapshot against its manifest and open it as a Chroma store."""
+        from langchain_community.vectorstores import Chroma
+
+        self.snapshots.verify(version)
+
+        vectorstore = Chroma(
+            persist_directory=self.snapshots.snapshot_path(version),
+            embedding_function=self.embeddings,
+        )
+
+        try:
+            if vectorstore._collection.count() == 0:
+                raise RuntimeError(f"Snapshot {version} is empty")
+
+            sample = vectorstore._collection.get(limit=1, include=["metadatas"])
+            sample_metadata = (sample.get("metadatas") or [{}])[0] or {}
+            if not all(field in sample_metadata for field in PARTITION_FIELDS):
+                raise RuntimeError(f"Snapshot {version} has no partition metadata")
+        except Exception:
+            close_chroma_store(vectorstore)
+            raise
+
+        return vectorstore
+
+    def build_snapshot(self, publish: bool = True) -> str:
+        """
+        Index the data directory into a new snapshot directory and, if
+        `publish` is set, make it the live snapshot. Running workers pick it
+        up on their next poll. Returns the snapshot version. Callers that
+        publish must hold `self.snapshots.build_lock()`.
+        """
+        from langchain_community.document_loaders import TextLoader, DirectoryLoader
+        from langchain_community.vectorstores import Chroma
+
         data_path = os.path.abspath(settings.data_path)
-        vectorstore_path = os.path.abspath(settings.vectorstore_path)
 
         print(f"Loading documents from: {data_path}")
-        print(f"Vector store path: {vectorstore_path}")
+        print(f"Vector store path: {self.snapshots.root}")
 
         os.makedirs(data_path, exist_ok=True)
-        os.makedirs(vectorstore_path, exist_ok=True)
 
         loader = DirectoryLoader(
             data_path,
@@ -110,16 +266,117 @@ class RAGService:
             self._create_sample_document(data_path)
             documents = loader.load()
 
-        texts = self.text_splitter.split_documents(documents)
-        print(f"Created {len(texts)} text chunks")
+        for doc in documents:
+            front_matter, doc.page_content = parse_front_matter(doc.page_content)
+            doc.metadata.update(
+                derive_partition_metadata(
+                    doc.metadata.get("source", ""), data_path, front_matter
+                )
+            )
+
+        chunks = self.text_splitter.split_documents(documents)
+        texts = deduplicate_documents(chunks, settings.dedup_threshold, group_by=PARTITION_FIELDS)
+        print(f"Created {len(texts)} text chunks ({len(chunks) - len(texts)} near-duplicates removed)")
 
-        self.vectorstore = Chroma.from_documents(
+        version, snapshot_path = self.snapshots.create_snapshot_dir()
+        print(f"Building index snapshot {version}...")
+
+        Chroma.from_documents(
             documents=texts,
             embedding=self.embeddings,
-            persist_directory=vectorstore_path,
+            persist_directory=snapshot_path,
         )
 
-        print("Vector store created successfully")
+        self.snapshots.write_manifest(
+            version,
+            embedding_model=settings.embedding_model,
+            documents=len(documents),
+            chunks=len(texts),
+            duplicates_removed=len(chunks) - len(texts),
+        )
+        print(f"Index snapshot {version} created successfully")
+
+        if publish:
+            self.snapshots.verify(version)
+            self.snapshots.publish(version)
+            removed = self.snapshots.prune(settings.index_snapshots_keep)
+            print(f"Published index snapshot {version}, pruned {len(removed)} old snapshots")
+
+        return version
+
+    @property
+    def vectorstore(self):
+        served = self._served
+        return served.vectorstore if served else None
+
+    @property
+    def snapshot_version(self) -> Optional[str]:
+        served = self._served
+        return served.version if served else None
+
+    def _serve(self, vectorstore, version: str):
+        """Make `vectorstore` the served store and retire the previous one."""
+        with self._swap_lock:
+            previous = self._served
+            self._served = ServedStore(vectorstore, version, close_chroma_store)
+
+        # Closed now if idle, otherwise when its last in-flight caller releases it
+        if previous is not None:
+            previous.retire()
+
+    def _checkout(self) -> ServedStore:
+        with self._swap_lock:
+            served = self._served
+            if served is None:
+                raise RuntimeError("Vector store not initialized")
+            served.acquire()
+        return served
+
+    def reload_if_changed(self) -> bool:
+        """
+        Swap in the live snapshot if it differs from the one being served.
+        The new store is opened before the swap; requests already holding
+        the previous store finish against it before it is closed.
+        """
+        version = self.snapshots.current_version()
+        if version is None or version == self.snapshot_version:
+            return False
+
+        print(f"Index snapshot changed: {self.snapshot_version} -> {version}")
+        self._serve(self._open_snapshot(version), version)
+
+        print(f"Reloaded vector store from snapshot {version}")
+        return True
+
+    def _start_watcher(self):
+        self._watcher = threading.Thread(
+            target=self._watch_snapshots,
+            name="rag-snapshot-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def _watch_snapshots(self):
+        while not self._stop_watcher.wait(settings.index_reload_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # Keep serving the current snapshot; retry on the next poll
+                print(f"❌ Failed to reload index snapshot: {e}")
+
+    def close(self):
+        """Stop the snapshot watcher and release the served store."""
+        self._stop_watcher.set()
+        if self._watcher is not None and self._watcher is not threading.current_thread():
+            self._watcher.join(timeout=5)
+
+        with self._swap_lock:
+            served = self._served
+            self._served = None
+
+        # Closed once any in-flight retrieval still holding it finishes
+        if served is not None:
+            served.retire()
 
     def _create_sample_document(self, data_path: str):
         sample_content = """PedaGrow AI - Educational Knowledge Base
@@ -134,39 +391,87 @@ Welcome to PedaGrow AI, an intelligent learning assistant designed to help stude
             f.write(sample_content)
 
     def retrieve_context(
-        self, query: str, top_k: Optional[int] = None
-    ) -> List[Document]:
-        if self.vectorstore is None:
-            raise RuntimeError("Vector store not initialized")
-
-        k = top_k or settings.top_k_retrieval
-        return self.vectorstore.similarity_search(query, k=k)
-
-    def get_context_text(
-        self, query: str, top_k: Optional[int] = None
-    ) -> str:
-        docs = self.retrieve_context(query, top_k)
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict] = None,
+    ) -> List["Document"]:
+        """
+        Retrieve the top_k chunks for `query`. `filters` is a Chroma `where`
+        clause (see build_metadata_filter) applied before ranking, so only
+        chunks from the requested partition are scored. With retrieval_mmr
+        enabled, the top_k are picked from retrieval_fetch_k candidates by
+        maximal marginal relevance so they carry distinct information.
+        """
+        # Hold the store for the whole call so a concurrent snapshot swap
+        # cannot close it underneath us
+        served = self._checkout()
+        try:
+            vectorstore = served.vectorstore
+            k = top_k or settings.top_k_retrieval
+            if settings.retrieval_mmr:
+                return vectorstore.max_marginal_relevance_search(
+                    query,
+                    k=k,
+                    fetch_k=max(settings.retrieval_fetch_k, k),
+                    lambda_mult=settings.retrieval_mmr_lambda,
+                    filter=filters,
+                )
+            return vectorstore.similarity_search(query, k=k, filter=filters)
+        finally:
+            served.release()
+
+    @staticmethod
+    def format_context_text(docs: List["Document"]) -> str:
         return "\n\n".join(
             f"[Context {i + 1}]\n{doc.page_content}"
             for i, doc in enumerate(docs)
         )
 
-    def get_sources(
-        self, query: str, top_k: Optional[int] = None
-    ) -> List[str]:
-        docs = self.retrieve_context(query, top_k)
+    @staticmethod
+    def format_sources(docs: List["Document"]) -> List[str]:
         return list(
             {
                 os.path.basename(doc.metadata.get("source", "Unknown"))
                 for doc in docs
             }
         )
+
+    def get_context_text(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict] = None,
+    ) -> str:
+        return self.format_context_text(self.retrieve_context(query, top_k, filters))
+
+    def get_sources(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict] = None,
+    ) -> List[str]:
+        return self.format_sources(self.retrieve_context(query, top_k, filters))
     
 _rag_service: RAGService | None = None
+_rag_service_lock = threading.Lock()
 
 
 def get_rag_service() -> RAGService:
     global _rag_service
     if _rag_service is None:
-        _rag_service = RAGService()
-    return _rag_service
\ No newline at end of file
+        # Routes call this from the threadpool; build one instance even when
+        # several cold requests arrive together
+        with _rag_service_lock:
+            if _rag_service is None:
+                _rag_service = RAGService()
+    return _rag_service
+
+
+def shutdown_rag_service():
+    """Close the RAG service if this process created one."""
+    global _rag_service
+    with _rag_service_lock:
+        service, _rag_service = _rag_service, None
+    if service is not None:
+        service.close()
@@ -0,0 +1,41 @@
+"""Build a new vector store snapshot offline and publish it.
+
+Running workers poll the snapshot pointer and reload the new index in the
+background, so content updates need no restart.
+
+Usage:
+    python build_index.py [--no-publish]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--no-publish",
+        action="store_true",
+        help="build and verify the snapshot without making it live",
+    )
+    args = parser.parse_args()
+
+    from app.services.rag_service import RAGService
+
+    print("=" * 50)
+    print("Building PedaGrow AI index snapshot")
+    print("=" * 50)
+
+    try:
+        rag_service = RAGService(load_vectorstore=False)
+        with rag_service.snapshots.build_lock():
+            version = rag_service.build_snapshot(publish=not args.no_publish)
+    except Exception as e:
+        print(f"\n❌ Error building index snapshot: {e}")
+        sys.exit(1)
+
+    if args.no_publish:
+        print(f"\n✅ Snapshot {version} built (not published)")
+    else:
+        print(f"\n✅ Snapshot {version} is now live")
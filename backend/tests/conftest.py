@@ -0,0 +1,23 @@
+"""Shared test setup: minimal settings so app.config can load without a .env."""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_TEST_ENV = {
+    "GITHUB_TOKEN": "test-token",
+    "LLM_PROVIDER": "github",
+    "LLM_MODEL": "test-model",
+    "EMBEDDING_PROVIDER": "local",
+    "EMBEDDING_MODEL": "test-embeddings",
+    "VECTOR_STORE_TYPE": "chroma",
+    "VECTORSTORE_PATH": os.path.join(tempfile.gettempdir(), "pedagrow-test-vectorstore"),
+    "CHUNK_SIZE": "500",
+    "CHUNK_OVERLAP": "50",
+    "TOP_K_RETRIEVAL": "3",
+    "MAX_CONTEXT_LENGTH": "1000",
+}
+
+for key, value in _TEST_ENV.items():
+    os.environ.setdefault(key, value)
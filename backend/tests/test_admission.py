@@ -0,0 +1,229 @@
+import asyncio
+import statistics
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.middleware.admission import (
+    AdmissionControlMiddleware,
+    ConcurrencyPool,
+    RouteClass,
+    TokenBucket,
+    client_key,
+)
+
+
+def _route_classes(llm_concurrency=1, llm_queue=1, llm_timeout=5.0, rate_per_minute=600.0, burst=100):
+    return {
+        "llm": RouteClass("llm", llm_concurrency, llm_queue, llm_timeout, rate_per_minute, burst),
+        "cheap": RouteClass("cheap", 100, 100, 1.0, 6000.0, 1000),
+    }
+
+
+class BlockingApp:
+    """ASGI app whose /api/chat responses wait until `release` is set."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        if scope["path"] == "/api/chat":
+            await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_token_bucket_exhaustion_and_refund():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert bucket.take() == pytest.approx(1.0, abs=0.05)
+
+    bucket.refund()
+    assert bucket.take() == 0
+
+
+def test_pool_rejects_when_queue_full():
+    async def scenario():
+        pool = ConcurrencyPool(max_concurrency=1, max_queue=1, queue_timeout=5.0)
+        assert await pool.acquire()
+
+        queued = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        assert pool.waiting == 1
+        assert not await pool.acquire()
+
+        pool.release()
+        assert await queued
+        pool.release()
+
+    asyncio.run(scenario())
+
+
+def test_pool_timeout_releases_queue_slot():
+    async def scenario():
+        pool = ConcurrencyPool(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        assert await pool.acquire()
+
+        assert not await pool.acquire()
+        assert pool.waiting == 0
+
+        # The timed-out waiter gave its queue slot back
+        queued = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        assert pool.waiting == 1
+        pool.release()
+        assert await queued
+
+    asyncio.run(scenario())
+
+
+def test_middleware_sheds_with_503_when_queue_full():
+    async def scenario():
+        inner = BlockingApp()
+        app = AdmissionControlMiddleware(inner, _route_classes(llm_concurrency=1, llm_queue=1))
+
+        async with _client(app) as client:
+            running = asyncio.ensure_future(client.post("/api/chat"))
+            queued = asyncio.ensure_future(client.post("/api/chat"))
+            await asyncio.sleep(0.05)
+
+            shed = await client.post("/api/chat")
+            assert shed.status_code == 503
+            assert int(shed.headers["Retry-After"]) >= 1
+
+            inner.release.set()
+            assert (await running).status_code == 200
+            assert (await queued).status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_middleware_rate_limits_with_429(monkeypatch):
+    monkeypatch.setattr(settings, "admission_client_key", "ip")
+
+    async def scenario():
+        inner = BlockingApp()
+        inner.release.set()
+        app = AdmissionControlMiddleware(inner, _route_classes(rate_per_minute=60.0, burst=2))
+
+        async with _client(app) as client:
+            assert (await client.post("/api/chat")).status_code == 200
+            assert (await client.post("/api/chat")).status_code == 200
+
+            limited = await client.post("/api/chat")
+            assert limited.status_code == 429
+            assert int(limited.headers["Retry-After"]) >= 1
+
+            # Other route classes have their own buckets
+            assert (await client.get("/api/health")).status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_shed_request_does_not_consume_rate(monkeypatch):
+    monkeypatch.setattr(settings, "admission_client_key", "ip")
+
+    async def scenario():
+        inner = BlockingApp()
+        route_classes = _route_classes(llm_concurrency=1, llm_queue=0, rate_per_minute=0.0, burst=2)
+        app = AdmissionControlMiddleware(inner, route_classes)
+
+        async with _client(app) as client:
+            running = asyncio.ensure_future(client.post("/api/chat"))
+            await asyncio.sleep(0.05)
+            assert (await client.post("/api/chat")).status_code == 503
+
+            inner.release.set()
+            assert (await running).status_code == 200
+            # One token spent by the request that ran, none by the shed one
+            assert (await client.post("/api/chat")).status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_rate_limiting_off_by_default():
+    assert settings.admission_client_key == "off"
+    assert client_key({"client": ("10.0.0.1", 1234), "headers": []}) is None
+
+
+def test_client_key_modes(monkeypatch):
+    scope = {
+        "client": ("10.0.0.1", 1234),
+        "headers": [
+            (b"x-forwarded-for", b"6.6.6.6, 203.0.113.7"),
+            (b"x-client-id", b"student-42"),
+        ],
+    }
+
+    monkeypatch.setattr(settings, "admission_client_key", "ip")
+    assert client_key(scope) == "10.0.0.1"
+
+    monkeypatch.setattr(settings, "admission_client_key", "forwarded_for")
+    monkeypatch.setattr(settings, "admission_trusted_proxy_hops", 1)
+    assert client_key(scope) == "203.0.113.7"
+
+    monkeypatch.setattr(settings, "admission_client_key", "header")
+    assert client_key(scope) == "header:student-42"
+    assert client_key({"client": ("10.0.0.1", 1234), "headers": []}) == "10.0.0.1"
+
+
+class _FakeRAGService:
+    def retrieve_context(self, query, top_k=None, filters=None):
+        return []
+
+    @staticmethod
+    def format_context_text(docs):
+        return ""
+
+    @staticmethod
+    def format_sources(docs):
+        return []
+
+
+class _BlockingLLMService:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def generate_response(self, query, context=None, conversation_history=None, task="chat"):
+        self.release.wait(timeout=10)
+        return "answer"
+
+
+def test_health_stays_fast_while_llm_pool_saturated(monkeypatch):
+    from app.api import routes
+    from app.main import app
+
+    llm = _BlockingLLMService()
+    monkeypatch.setattr(routes, "get_rag_service", lambda: _FakeRAGService())
+    monkeypatch.setattr(routes, "get_llm_service", lambda: llm)
+
+    async def scenario():
+        async with _client(app) as client:
+            # Fill every LLM slot and part of the queue
+            chats = [
+                asyncio.ensure_future(client.post("/api/chat", json={"message": "hi"}))
+                for _ in range(settings.admission_llm_concurrency + 2)
+            ]
+            await asyncio.sleep(0.2)
+
+            latencies = []
+            for _ in range(20):
+                started = time.perf_counter()
+                response = await client.get("/api/health")
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200
+
+            llm.release.set()
+            assert all(r.status_code == 200 for r in await asyncio.gather(*chats))
+            return latencies
+
+    latencies = asyncio.run(scenario())
+    assert statistics.median(latencies) < 10
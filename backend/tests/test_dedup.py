@@ -0,0 +1,58 @@
+from langchain_core.documents import Document
+
+from app.services.dedup import (
+    deduplicate_documents,
+    estimate_similarity,
+    find_near_duplicates,
+    minhash_signature,
+    shingles,
+)
+from app.services.rag_service import PARTITION_FIELDS
+
+SHARED = (
+    "Linear equations are equations where the highest power of the variable is one. "
+    "To solve them, isolate the variable by applying the same operation to both sides "
+    "of the equation until the variable stands alone and its value can be read off."
+)
+OTHER = (
+    "Photosynthesis is the process by which green plants use sunlight, water and carbon "
+    "dioxide to produce glucose and oxygen inside the chloroplasts of their leaf cells."
+)
+
+
+def _doc(text, curriculum="cbse", class_level="class_9", subject="mathematics"):
+    return Document(
+        page_content=text,
+        metadata={"curriculum": curriculum, "class_level": class_level, "subject": subject},
+    )
+
+
+def test_signature_similarity_tracks_overlap():
+    base = minhash_signature(shingles(SHARED))
+    assert estimate_similarity(base, minhash_signature(shingles(SHARED + " Practise daily."))) > 0.8
+    assert estimate_similarity(base, minhash_signature(shingles(OTHER))) < 0.2
+
+
+def test_find_near_duplicates_keeps_first_occurrence():
+    texts = [SHARED, OTHER, SHARED.replace(".", ","), SHARED.upper()]
+    assert find_near_duplicates(texts, 0.85) == {2, 3}
+
+
+def test_deduplicate_within_partition():
+    docs = [_doc(SHARED), _doc(OTHER), _doc(SHARED + " ")]
+    kept = deduplicate_documents(docs, 0.85, group_by=PARTITION_FIELDS)
+    assert kept == docs[:2]
+
+
+def test_deduplicate_keeps_shared_text_in_each_partition():
+    class_9 = _doc(SHARED, class_level="class_9")
+    class_10 = _doc(SHARED, class_level="class_10")
+
+    kept = deduplicate_documents([class_9, class_10], 0.85, group_by=PARTITION_FIELDS)
+
+    assert kept == [class_9, class_10]
+
+
+def test_deduplicate_disabled_by_threshold_one():
+    docs = [_doc(SHARED), _doc(SHARED)]
+    assert deduplicate_documents(docs, 1.0, group_by=PARTITION_FIELDS) == docs
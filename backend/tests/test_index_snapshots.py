@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.services.index_snapshots import ServedStore, SnapshotStore, close_chroma_store
+
+
+def _build(store, content="index data"):
+    version, path = store.create_snapshot_dir()
+    with open(os.path.join(path, "chroma.sqlite3"), "w") as f:
+        f.write(content)
+    os.makedirs(os.path.join(path, "segment"))
+    with open(os.path.join(path, "segment", "data.bin"), "w") as f:
+        f.write(content)
+    store.write_manifest(version, chunks=1)
+    return version
+
+
+def test_build_lock_is_exclusive_across_holders(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    events = []
+    first_holds_lock = threading.Event()
+
+    def first():
+        with store.build_lock():
+            first_holds_lock.set()
+            time.sleep(0.2)
+            events.append("first released")
+
+    def second():
+        first_holds_lock.wait()
+        with SnapshotStore(str(tmp_path)).build_lock():
+            events.append("second acquired")
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert events == ["first released", "second acquired"]
+
+
+def test_prune_refuses_to_keep_fewer_than_two(tmp_path):
+    with pytest.raises(ValueError):
+        SnapshotStore(str(tmp_path)).prune(1)
+
+
+def test_settings_reject_index_snapshots_keep_below_two():
+    with pytest.raises(ValidationError):
+        Settings(index_snapshots_keep=1)
+
+
+def test_publish_switches_current(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    assert store.current_version() is None
+
+    first = _build(store)
+    store.publish(first)
+    assert store.current_version() == first
+
+    second = _build(store)
+    store.publish(second)
+    assert store.current_version() == second
+    assert store.list_versions() == [first, second]
+    assert not any(name.startswith("CURRENT.") for name in os.listdir(tmp_path))
+
+
+def test_publish_unknown_version_fails(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    with pytest.raises(RuntimeError):
+        store.publish("missing")
+    assert store.current_version() is None
+
+
+def test_verify_accepts_intact_snapshot(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    version = _build(store)
+    store.verify(version)
+    assert set(store.read_manifest(version)["files"]) == {"chroma.sqlite3", "segment/data.bin"}
+
+
+def test_verify_detects_modified_file(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    version = _build(store)
+    with open(os.path.join(store.snapshot_path(version), "segment", "data.bin"), "w") as f:
+        f.write("corrupted")
+
+    with pytest.raises(RuntimeError, match="checksum mismatch"):
+        store.verify(version)
+
+
+def test_verify_detects_missing_file_and_manifest(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    version = _build(store)
+    os.remove(os.path.join(store.snapshot_path(version), "chroma.sqlite3"))
+    with pytest.raises(RuntimeError, match="missing"):
+        store.verify(version)
+
+    os.remove(os.path.join(store.snapshot_path(version), "manifest.json"))
+    with pytest.raises(RuntimeError, match="no manifest"):
+        store.verify(version)
+
+
+def test_prune_keeps_newest_and_live_snapshot(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    versions = [_build(store) for _ in range(5)]
+
+    # Live snapshot is an old one, e.g. after a rollback
+    store.publish(versions[1])
+    removed = store.prune(3)
+
+    assert removed == [versions[0], versions[2]]
+    assert store.list_versions() == [versions[1], versions[3], versions[4]]
+    store.verify(versions[1])
+
+
+def test_served_store_closes_after_last_user_releases():
+    closed = []
+    served = ServedStore("store", "v1", closed.append)
+
+    assert served.acquire() == "store"
+    served.retire()
+    assert closed == []
+
+    served.release()
+    assert closed == ["store"]
+    assert served.closed
+    with pytest.raises(RuntimeError):
+        served.acquire()
+
+
+def test_served_store_closes_immediately_when_idle():
+    closed = []
+    served = ServedStore("store", "v1", closed.append)
+    served.acquire()
+    served.release()
+    assert closed == []
+
+    served.retire()
+    served.retire()
+    assert closed == ["store"]
+
+
+def test_close_chroma_store_stops_client_system():
+    class System:
+        stopped = False
+
+        def stop(self):
+            self.stopped = True
+
+    class Client:
+        _system = System()
+
+    class Store:
+        _client = Client()
+
+    close_chroma_store(Store())
+    assert Client._system.stopped
+    # Stores without a client are ignored
+    close_chroma_store(object())
@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.config import settings
+from app.services.model_router import (
+    ModelRouter,
+    TaskProfile,
+    load_task_profiles,
+    parse_tiers,
+)
+
+STUB_TIMEOUT = 0.5
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Minimal OpenAI-compatible chat completions endpoint. The model name picks
+    the behaviour: "slow-*" outlives the client timeout, "broken-*" returns
+    500, "limited-*" returns 429, "flaky-*" returns 500 on its first request
+    only and anything else answers with its own name.
+    """
+
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        model = body["model"]
+        StubOpenAIHandler.requests.append(body)
+        attempt = sum(1 for r in StubOpenAIHandler.requests if r["model"] == model)
+
+        if model.startswith("slow"):
+            time.sleep(STUB_TIMEOUT * 3)
+            status, payload = 200, self._completion(model)
+        elif model.startswith("broken") or (model.startswith("flaky") and attempt == 1):
+            status, payload = 500, {"error": {"message": "boom", "type": "server_error"}}
+        elif model.startswith("limited"):
+            status, payload = 429, {"error": {"message": "slow down", "type": "rate_limit"}}
+        else:
+            status, payload = 200, self._completion(model)
+
+        data = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client already gave up on a slow response
+            pass
+
+    @staticmethod
+    def _completion(model):
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": f"answer from {model}"},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenAIHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def clear_requests():
+    StubOpenAIHandler.requests.clear()
+
+
+def _profiles(**tiers):
+    return {
+        name: TaskProfile(name, tier=tier, max_tokens=100 + tier, temperature=0.5, timeout=STUB_TIMEOUT)
+        for name, tier in (tiers or {"chat": 0}).items()
+    }
+
+
+def _router(tiers, base_url="http://unused", profiles=None, long_prompt_chars=100, max_retries=0):
+    return ModelRouter(
+        tiers=tiers,
+        profiles=profiles or _profiles(),
+        base_url=base_url,
+        api_key="test-token",
+        long_prompt_chars=long_prompt_chars,
+        max_retries=max_retries,
+    )
+
+
+def test_parse_tiers():
+    assert parse_tiers(" small, large ,", "default") == ["small", "large"]
+    assert parse_tiers("", "default") == ["default"]
+
+
+def test_route_orders_chosen_tier_first():
+    router = _router(["small", "mid", "large"], profiles=_profiles(chat=0, quiz=1))
+    assert router.route("chat", 10) == ["small", "mid", "large"]
+    assert router.route("quiz", 10) == ["mid", "small", "large"]
+
+
+def test_route_bumps_long_prompts_one_tier():
+    router = _router(["small", "mid", "large"], profiles=_profiles(chat=0, quiz=2))
+    assert router.route("chat", 101) == ["mid", "small", "large"]
+    # Already on the top tier
+    assert router.route("quiz", 101) == ["large", "small", "mid"]
+
+
+def test_route_long_prompt_rule_disabled():
+    router = _router(["small", "large"], long_prompt_chars=0)
+    assert router.route("chat", 10_000)[0] == "small"
+
+
+def test_unknown_task_rejected():
+    with pytest.raises(ValueError):
+        _router(["small"]).route("poetry", 10)
+
+
+def test_load_task_profiles_overrides(monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "llm_task_profiles",
+        {"quiz": {"tier": 1, "temperature": 0.1}, "grading": {"max_tokens": 64, "timeout": 5}},
+    )
+    profiles = load_task_profiles()
+
+    assert (profiles["quiz"].tier, profiles["quiz"].temperature, profiles["quiz"].max_tokens) == (1, 0.1, 2048)
+    assert profiles["quiz"].timeout > profiles["chat"].timeout == settings.llm_timeout
+    assert profiles["chat"].max_tokens == settings.max_context_length
+    assert profiles["chat"].temperature == 0.7
+    assert profiles["grading"].max_tokens == 64
+    assert profiles["grading"].tier == 0
+    assert profiles["grading"].timeout == 5.0
+
+
+def test_non_fallback_errors_propagate():
+    class FailingClient:
+        def invoke(self, messages):
+            raise ValueError("bad request")
+
+    router = _router(["small", "large"])
+    router._get_client = lambda model, profile, max_retries: FailingClient()
+    with pytest.raises(ValueError):
+        router.invoke([HumanMessage(content="hi")])
+
+
+def test_stub_answers_with_profile_settings(stub_url):
+    router = _router(["good-small"], base_url=stub_url)
+    assert router.invoke([HumanMessage(content="hi")]) == "answer from good-small"
+
+    [request] = StubOpenAIHandler.requests
+    assert request["max_tokens"] == 100
+    assert request["temperature"] == 0.5
+
+
+@pytest.mark.parametrize("failing", ["broken-small", "limited-small", "slow-small"])
+def test_stub_falls_back_to_next_tier(stub_url, failing):
+    router = _router([failing, "good-large"], base_url=stub_url)
+    assert router.invoke([HumanMessage(content="hi")]) == "answer from good-large"
+    assert [r["model"] for r in StubOpenAIHandler.requests] == [failing, "good-large"]
+
+
+def test_stub_long_prompt_goes_to_next_tier(stub_url):
+    router = _router(["good-small", "good-large"], base_url=stub_url)
+    assert router.invoke([HumanMessage(content="x" * 500)]) == "answer from good-large"
+
+
+def test_stub_raises_when_every_tier_fails(stub_url):
+    import openai
+
+    router = _router(["broken-small", "limited-large"], base_url=stub_url)
+    with pytest.raises(openai.RateLimitError):
+        router.invoke([HumanMessage(content="hi")])
+
+
+def test_stub_retries_single_tier(stub_url):
+    router = _router(["flaky-only"], base_url=stub_url, max_retries=1)
+    assert router.invoke([HumanMessage(content="hi")]) == "answer from flaky-only"
+    assert [r["model"] for r in StubOpenAIHandler.requests] == ["flaky-only", "flaky-only"]
+
+
+def test_stub_retries_only_the_last_tier(stub_url):
+    router = _router(["flaky-small", "flaky-large"], base_url=stub_url, max_retries=1)
+    assert router.invoke([HumanMessage(content="hi")]) == "answer from flaky-large"
+    assert [r["model"] for r in StubOpenAIHandler.requests] == ["flaky-small", "flaky-large", "flaky-large"]
+
+
+def test_stub_timeout_follows_task_profile(stub_url):
+    profiles = _profiles(chat=0, quiz=0)
+    profiles["quiz"].timeout = STUB_TIMEOUT * 6
+    router = _router(["slow-small", "good-large"], base_url=stub_url, profiles=profiles)
+
+    assert router.invoke([HumanMessage(content="hi")], task="chat") == "answer from good-large"
+    assert router.invoke([HumanMessage(content="hi")], task="quiz") == "answer from slow-small"
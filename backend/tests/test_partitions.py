@@ -0,0 +1,83 @@
+import os
+
+from app.services.rag_service import (
+    ANY_VALUE,
+    build_metadata_filter,
+    derive_partition_metadata,
+    parse_front_matter,
+)
+
+DATA = os.path.join(os.sep, "srv", "data")
+
+
+def test_parse_front_matter_strips_header():
+    fields, body = parse_front_matter("---\nSubject: Physics\nclass_level: Class 9\n---\nNewton's laws")
+    assert fields == {"subject": "Physics", "class_level": "Class 9"}
+    assert body == "Newton's laws"
+
+
+def test_parse_front_matter_without_header():
+    text = "Plain text\n---\nnot a header"
+    assert parse_front_matter(text) == ({}, text)
+
+
+def test_derive_metadata_from_directory_layout():
+    source = os.path.join(DATA, "CBSE", "Class 10", "Mathematics", "algebra.txt")
+    assert derive_partition_metadata(source, DATA, {}) == {
+        "curriculum": "cbse",
+        "class_level": "class_10",
+        "subject": "mathematics",
+    }
+
+
+def test_derive_metadata_partial_layout_and_front_matter_override():
+    source = os.path.join(DATA, "mathematics", "algebra.txt")
+    assert derive_partition_metadata(source, DATA, {"class_level": "Class-9"}) == {
+        "curriculum": ANY_VALUE,
+        "class_level": "class_9",
+        "subject": "mathematics",
+    }
+
+
+def test_derive_metadata_for_untagged_file():
+    source = os.path.join(DATA, "study_techniques.txt")
+    assert derive_partition_metadata(source, DATA, {}) == {
+        field: ANY_VALUE for field in ("curriculum", "class_level", "subject")
+    }
+
+
+def test_build_metadata_filter_empty():
+    assert build_metadata_filter() is None
+
+
+def test_build_metadata_filter_single_field():
+    assert build_metadata_filter(subject="Mathematics") == {
+        "subject": {"$in": ["mathematics", ANY_VALUE]}
+    }
+
+
+def test_build_metadata_filter_subject_aliases():
+    physics = build_metadata_filter(subject="Physics")["subject"]["$in"]
+    assert physics == ["physics", "science", ANY_VALUE]
+
+    science = build_metadata_filter(subject="Science")["subject"]["$in"]
+    assert set(science) == {"science", "physics", "chemistry", "biology", ANY_VALUE}
+
+
+def test_build_metadata_filter_combines_fields():
+    assert build_metadata_filter(subject="Maths", class_level="Class 10", curriculum="CBSE") == {
+        "$and": [
+            {"subject": {"$in": ["maths", "mathematics", ANY_VALUE]}},
+            {"class_level": {"$in": ["class_10", ANY_VALUE]}},
+            {"curriculum": {"$in": ["cbse", ANY_VALUE]}},
+        ]
+    }
+
+
+def test_science_data_is_tagged_per_subject():
+    data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    for subject in ("physics", "chemistry", "biology"):
+        source = os.path.join(data_path, f"{subject}_fundamentals.txt")
+        with open(source, encoding="utf-8") as f:
+            front_matter, _ = parse_front_matter(f.read())
+        assert derive_partition_metadata(source, data_path, front_matter)["subject"] == subject
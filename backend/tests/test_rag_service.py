@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+from app.services import rag_service
+from app.services.index_snapshots import ServedStore
+from app.services.rag_service import RAGService
+
+
+def _bare_service(served):
+    # Skip __init__, which loads the embedding model and vector store
+    service = RAGService.__new__(RAGService)
+    service._served = served
+    service._swap_lock = threading.Lock()
+    service._stop_watcher = threading.Event()
+    service._watcher = threading.Thread(target=service._stop_watcher.wait, daemon=True)
+    service._watcher.start()
+    return service
+
+
+def test_close_stops_watcher_and_retires_store():
+    closed = []
+    service = _bare_service(ServedStore("store", "v1", closed.append))
+
+    service.close()
+
+    assert not service._watcher.is_alive()
+    assert closed == ["store"]
+    assert service.vectorstore is None
+
+
+def test_close_waits_for_in_flight_retrieval():
+    closed = []
+    served = ServedStore("store", "v1", closed.append)
+    service = _bare_service(served)
+
+    checked_out = service._checkout()
+    service.close()
+    assert closed == []
+
+    checked_out.release()
+    assert closed == ["store"]
+
+
+def test_app_shutdown_closes_rag_service(monkeypatch):
+    from app.main import app, lifespan
+
+    closed = []
+
+    class FakeService:
+        def close(self):
+            closed.append(True)
+
+    monkeypatch.setattr(rag_service, "_rag_service", FakeService())
+
+    async def run_lifespan():
+        async with lifespan(app):
+            pass
+
+    asyncio.run(run_lifespan())
+
+    assert closed == [True]
+    assert rag_service._rag_service is None
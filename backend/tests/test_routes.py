@@ -0,0 +1,113 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.api import routes
+from app.main import app
+from app.services import llm_service, rag_service
+
+QUIZ_JSON = json.dumps(
+    {
+        "questions": [
+            {"question": f"Question {i}?", "options": ["A", "B", "C", "D"], "correct_answer": 0}
+            for i in range(5)
+        ]
+    }
+)
+
+
+class _RecordingLLMService:
+    def __init__(self):
+        self.calls = []
+
+    def generate_response(self, query, context=None, conversation_history=None, task="chat"):
+        self.calls.append({"context": context, "task": task})
+        return QUIZ_JSON
+
+
+def _post(path, payload):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=payload)
+
+    return asyncio.run(scenario())
+
+
+def test_quiz_generation_survives_rag_failure(monkeypatch):
+    llm = _RecordingLLMService()
+
+    def broken_rag_service():
+        raise RuntimeError("embedding model failed to load")
+
+    monkeypatch.setattr(routes, "get_rag_service", broken_rag_service)
+    monkeypatch.setattr(routes, "get_llm_service", lambda: llm)
+
+    response = _post(
+        "/api/quiz/generate",
+        {"subject": "Physics", "class_level": "Class 9", "curriculum": "CBSE"},
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == 5
+    assert llm.calls == [{"context": "", "task": "quiz"}]
+
+
+def test_quiz_generation_survives_retrieval_failure(monkeypatch):
+    llm = _RecordingLLMService()
+
+    class FailingRAGService:
+        def get_context_text(self, query, top_k=None, filters=None):
+            raise RuntimeError("Vector store not initialized")
+
+    monkeypatch.setattr(routes, "get_rag_service", lambda: FailingRAGService())
+    monkeypatch.setattr(routes, "get_llm_service", lambda: llm)
+
+    response = _post(
+        "/api/quiz/generate",
+        {"subject": "Mathematics", "class_level": "Class 10", "curriculum": "CBSE"},
+    )
+
+    assert response.status_code == 200
+    assert llm.calls[0]["context"] == ""
+
+
+@pytest.mark.parametrize(
+    "module, attr, cls, getter",
+    [
+        (rag_service, "_rag_service", "RAGService", rag_service.get_rag_service),
+        (llm_service, "_llm_service", "LLMService", llm_service.get_llm_service),
+    ],
+)
+def test_service_getter_builds_one_instance_under_concurrency(monkeypatch, module, attr, cls, getter):
+    created = []
+
+    class SlowService:
+        def __init__(self):
+            # Widen the window in which an unguarded getter would build twice
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(module, attr, None)
+    monkeypatch.setattr(module, cls, SlowService)
+
+    start = threading.Barrier(8)
+    results = []
+
+    def call():
+        start.wait()
+        results.append(getter())
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert len(created) == 1
+    assert len(results) == 8
+    assert all(result is created[0] for result in results)